@@ -1,26 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from app.database import get_db
 from app.models import User
 from pydantic import BaseModel
+from cachetools import TTLCache
+import bcrypt
+import hashlib
+import jwt
 import logging
+import os
+import threading
+import time
 
 # Constants for JWT
 SECRET_KEY = "your_secret_key"  # Replace with a secure key
 ALGORITHM = "HS256"
+SECRET_KEY_BYTES = SECRET_KEY.encode()  # Encoded once instead of on every sign/verify
+# Claims every access token must carry; tokens without an expiry are rejected
+JWT_DECODE_OPTIONS = {"verify_aud": False, "require": ["sub", "exp"]}
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; lower it (e.g. BCRYPT_ROUNDS=4) for tests and CI
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Checked against when the username does not exist, so unknown users cost one bcrypt
+# verify like known ones and response time does not reveal which usernames exist
+DUMMY_HASH = bcrypt.hashpw(b"dummy-password", bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+# Successful password checks, remembered briefly so login bursts skip bcrypt.
+# Failures are never cached. login runs in the threadpool, hence the lock.
+_pwd_cache = TTLCache(maxsize=1000, ttl=10)
+_pwd_cache_lock = threading.Lock()
+
+# Built once at import; SQLAlchemy's compiled cache then reuses the SQL for every lookup
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
 
 # Initialize the router
 router = APIRouter()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Pydantic model for user creation
@@ -31,73 +52,129 @@ class UserCreate(BaseModel):
 
 # Helper functions for password verification and hashing
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+def verify_password_cached(username: str, plain_password: str, hashed_password: str) -> bool:
+    # The stored hash is part of the key, so a password change invalidates the entry
+    key = hashlib.sha256(f"{username}|{plain_password}|{hashed_password}".encode()).digest()
+    with _pwd_cache_lock:
+        if _pwd_cache.get(key):
+            return True
+    if not verify_password(plain_password, hashed_password):
+        return False
+    with _pwd_cache_lock:
+        _pwd_cache[key] = True
+    return True
 
 # Function to create a JWT token
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY_BYTES, algorithm=ALGORITHM)
     return encoded_jwt
 
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+# Decoded tokens keyed by a digest of the token (never the raw token) -> (username, exp)
+_jwt_cache = TTLCache(maxsize=10000, ttl=30)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    key = hashlib.sha256(token.encode()).digest()[:16]
+    cached = _jwt_cache.get(key)
+    if cached is not None and cached[1] > time.time():
+        username = cached[0]
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY_BYTES, algorithms=[ALGORITHM], options=JWT_DECODE_OPTIONS)
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except jwt.InvalidTokenError:
+            raise credentials_exception
+        _jwt_cache[key] = (username, payload["exp"])
+    # Always load the row so deleted or changed users take effect immediately
+    user = db.scalar(USER_BY_USERNAME, {"username": username})
+    if user is None:
+        raise credentials_exception
+    return user
+
+
 # Endpoint for user registration
 @router.post("/register/")
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     try:
-        logger.info(f"Received registration request for username: {user.username}, email: {user.email}")
-
-        # Check if the username already exists
-        db_user = db.query(User).filter(User.username == user.username).first()
-        if db_user:
-            logger.warning(f"Username {user.username} already registered.")
-            raise HTTPException(status_code=400, detail="Username already registered")
-        
-        # Check if the email already exists
-        db_user = db.query(User).filter(User.email == user.email).first()
-        if db_user:
-            logger.warning(f"Email {user.email} already registered.")
+        logger.info("Received registration request for username: %s, email: %s", user.username, user.email)
+
+        # Check for an existing username or email in a single query
+        conflict = db.query(User.username, User.email).filter(
+            (User.username == user.username) | (User.email == user.email)
+        ).first()
+        if conflict:
+            if conflict.username == user.username:
+                logger.warning("Username %s already registered.", user.username)
+                raise HTTPException(status_code=400, detail="Username already registered")
+            logger.warning("Email %s already registered.", user.email)
             raise HTTPException(status_code=400, detail="Email already registered")
-        
+
         # Hash the user's password
         hashed_password = get_password_hash(user.password)
-        logger.info(f"Password hashed successfully for username: {user.username}")
+        logger.info("Password hashed successfully for username: %s", user.username)
 
         # Create a new user
         new_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
         db.add(new_user)
         db.commit()
-        db.refresh(new_user)
-        logger.info(f"User {new_user.username} registered successfully.")
+        logger.info("User %s registered successfully.", new_user.username)
 
         return {"username": new_user.username, "email": new_user.email}
     
+    except HTTPException:
+        raise
+    except IntegrityError:
+        # A concurrent registration won the race past the check above
+        db.rollback()
+        logger.warning("Username %s or email %s already registered.", user.username, user.email)
+        raise HTTPException(status_code=400, detail="Username or email already registered")
     except Exception as e:
-        logger.error(f"Error during registration for username: {user.username}, email: {user.email}: {e}")
+        logger.error("Error during registration for username: %s, email: %s: %s", user.username, user.email, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Endpoint for user login
 @router.post("/login/")
 def login(user: UserCreate, db: Session = Depends(get_db)):
     try:
-        logger.info(f"Login attempt for username: {user.username}")
-
-        db_user = db.query(User).filter(User.username == user.username).first()
-        if db_user is None or not verify_password(user.password, db_user.hashed_password):
-            logger.warning(f"Invalid login attempt for username: {user.username}")
+        logger.info("Login attempt for username: %s", user.username)
+
+        db_user = db.scalar(USER_BY_USERNAME, {"username": user.username})
+        if db_user is None:
+            # Burn the same bcrypt time as a real check before rejecting
+            verify_password(user.password, DUMMY_HASH)
+            password_ok = False
+        else:
+            password_ok = verify_password_cached(user.username, user.password, db_user.hashed_password)
+        if not password_ok:
+            logger.warning("Invalid login attempt for username: %s", user.username)
             raise HTTPException(status_code=401, detail="Invalid username or password")
 
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": db_user.username}, expires_delta=access_token_expires
         )
-        logger.info(f"User {user.username} logged in successfully. Token generated.")
+        logger.info("User %s logged in successfully. Token generated.", user.username)
 
         return {"access_token": access_token, "token_type": "bearer"}
     
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error during login for username: {user.username}: {e}")
+        logger.error("Error during login for username: %s: %s", user.username, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from fastapi.responses import JSONResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import JsonCoder
+from fastapi_cache.decorator import cache
+from fastapi_cache.backends.inmemory import InMemoryBackend, Value
+from functools import wraps
+import anyio
+import asyncio
+
+# Cache namespaces for the read endpoints; none is a prefix of another, since clearing matches by prefix
+MOVIES_LIST = "movies_list"
+MOVIE_DETAIL = "movie_detail"
+MOVIE_RATINGS = "movie_ratings"
+MOVIE_COMMENTS = "movie_comments"
+
+class BoundedInMemoryBackend(InMemoryBackend):
+    """In-memory cache backend that evicts the least recently used entry beyond maxsize."""
+
+    def __init__(self, maxsize: int = 1024):
+        self._store = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.maxsize = maxsize
+
+    def _get(self, key: str):
+        value = super()._get(key)
+        if value:
+            self._store.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, expire: int = None) -> None:
+        async with self._lock:
+            self._store[key] = Value(value, self._now + (expire or 0))
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+class RawJSONResponse(JSONResponse):
+    """JSON response whose content is already-serialised bytes."""
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+class RawJSONCoder(JsonCoder):
+    """Caches a RawJSONResponse body as-is and replays it without re-validating."""
+
+    @classmethod
+    def decode_as_type(cls, value: bytes, *, type_=None) -> RawJSONResponse:
+        return RawJSONResponse(value)
+
+def cache_raw_json(expire: int, namespace: str):
+    """Like fastapi-cache's @cache, for endpoints that return a RawJSONResponse.
+
+    fastapi-cache writes its Cache-Control, ETag and X-FastAPI-Cache headers to the
+    injected response, which FastAPI drops when the endpoint returns its own Response,
+    so they are copied onto the returned response here.
+    """
+    def wrapper(func):
+        cached = cache(expire=expire, namespace=namespace, coder=RawJSONCoder)(func)
+
+        @wraps(cached)
+        async def inner(*args, **kwargs):
+            result = await cached(*args, **kwargs)
+            response = kwargs.get("__fastapi_cache_response")
+            # A 304 for a matching If-None-Match is the injected response itself
+            if response is not None and result is not response:
+                result.headers.update(response.headers)
+            return result
+
+        return inner
+
+    return wrapper
+
+def request_key_builder(func, namespace: str = "", *, request=None, response=None, args=(), kwargs=None) -> str:
+    # Key on the URL only; the endpoint kwargs include the per-request DB session
+    return f"{namespace}:{request.url.path}?{request.query_params}"
+
+def invalidate(*namespaces: str) -> None:
+    """Drop cached responses from sync endpoints, which run in anyio worker threads."""
+    for namespace in namespaces:
+        anyio.from_thread.run(FastAPICache.clear, namespace)
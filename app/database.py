@@ -1,16 +1,52 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import logging
 
 DATABASE_URL = "sqlite:///./test.db"  # Update this with your actual database URL
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./test.db"  # Same database, used by the async read endpoints
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})  # For SQLite
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},  # For SQLite
+    poolclass=QueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+# Read-only endpoints run on the event loop through this engine
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside a writer and avoids an fsync per commit;
+    # reads go through a 256 MB memory map and a 64 MB page cache
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
+for sqlite_engine in (engine, async_engine.sync_engine):
+    if sqlite_engine.dialect.name == "sqlite":
+        event.listen(sqlite_engine, "connect", set_sqlite_pragmas)
+
+# expire_on_commit=False keeps committed objects loaded, so returning them needs no extra SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def get_db():
@@ -20,12 +56,16 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
     try:
         # Import all models here to ensure they are registered with Base
-        from models import User, Movie, Rating, Comment
+        from app.models import User, Movie, Rating, Comment
         Base.metadata.create_all(bind=engine)
         logger.info("Database initialized successfully.")
     except Exception as e:
-        logger.error(f"Failed to initialize the database: {e}")
+        logger.error("Failed to initialize the database: %s", e)
         raise
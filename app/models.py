@@ -21,7 +21,7 @@ class Movie(Base):
     title = Column(String, index=True)
     description = Column(String)
     release_year = Column(Integer)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
 
     owner = relationship("User", back_populates="movies")
     ratings = relationship("Rating", back_populates="movie")
@@ -30,7 +30,7 @@ class Movie(Base):
 class Rating(Base):
     __tablename__ = "ratings"
     id = Column(Integer, primary_key=True, index=True)
-    movie_id = Column(Integer, ForeignKey("movies.id"))
+    movie_id = Column(Integer, ForeignKey("movies.id"), index=True)
     rating = Column(Integer)
     user_id = Column(Integer, ForeignKey("users.id"))
 
@@ -40,7 +40,7 @@ class Rating(Base):
 class Comment(Base):
     __tablename__ = "comments"
     id = Column(Integer, primary_key=True, index=True)
-    movie_id = Column(Integer, ForeignKey("movies.id"))
+    movie_id = Column(Integer, ForeignKey("movies.id"), index=True)
     text = Column(String)
     user_id = Column(Integer, ForeignKey("users.id"))
     parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from pydantic import BaseModel, TypeAdapter
+from app.database import get_async_db, get_db
 from app.models import Movie, Rating, Comment, User
+from app.schemas import MovieSummary, MovieOut, RatingOut, CommentOut
+from app.cache import RawJSONResponse, cache_raw_json, invalidate, MOVIES_LIST, MOVIE_DETAIL, MOVIE_RATINGS, MOVIE_COMMENTS
 from app.auth import get_current_user
+from fastapi_cache.decorator import cache
+from typing import Optional
 import logging
 
 router = APIRouter()
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Validates and serialises a whole page of movies in one compiled pass
+_MOVIES_ADAPTER = TypeAdapter(list[MovieSummary])
+
 # Pydantic model for movie creation
 class MovieCreate(BaseModel):
     title: str
@@ -25,32 +33,44 @@ class MovieUpdate(BaseModel):
     release_year: int
 
 # Endpoint to list all movies
-@router.get("/", response_model=list[Movie])
-def read_movies(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+# Keyset pagination: pass the last id of the previous page as after_id
+@router.get("/", response_model=list[MovieSummary])
+@cache_raw_json(expire=30, namespace=MOVIES_LIST)
+async def read_movies(after_id: Optional[int] = None, limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_async_db)) -> Response:
     try:
-        movies = db.query(Movie).offset(skip).limit(limit).all()
-        logger.info(f"Fetched {len(movies)} movies.")
-        return movies
+        query = select(Movie.id, Movie.title, Movie.release_year)
+        if after_id is not None:
+            query = query.where(Movie.id > after_id)
+        rows = (await db.execute(query.order_by(Movie.id).limit(limit))).all()
+        logger.debug("Fetched %d movies.", len(rows))
+        # Returning a Response skips FastAPI's per-item response_model validation and encoding
+        movies = _MOVIES_ADAPTER.validate_python(rows, from_attributes=True)
+        return RawJSONResponse(_MOVIES_ADAPTER.dump_json(movies))
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching movies: {e}")
+        logger.error("Error fetching movies: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Endpoint to get a movie by ID
-@router.get("/{movie_id}", response_model=Movie)
-def read_movie(movie_id: int, db: Session = Depends(get_db)):
+@router.get("/{movie_id}", response_model=MovieOut)
+@cache(expire=60, namespace=MOVIE_DETAIL)
+async def read_movie(movie_id: int, db: AsyncSession = Depends(get_async_db)) -> MovieOut:
     try:
-        movie = db.query(Movie).filter(Movie.id == movie_id).first()
+        movie = await db.get(Movie, movie_id)
         if movie is None:
-            logger.warning(f"Movie with ID {movie_id} not found.")
+            logger.warning("Movie with ID %s not found.", movie_id)
             raise HTTPException(status_code=404, detail="Movie not found")
-        logger.info(f"Fetched movie with ID {movie_id}.")
-        return movie
+        logger.debug("Fetched movie with ID %s.", movie_id)
+        return MovieOut.model_validate(movie)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching movie with ID {movie_id}: {e}")
+        logger.error("Error fetching movie with ID %s: %s", movie_id, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Secure Endpoint to create a new movie
-@router.post("/", response_model=Movie)
+@router.post("/", response_model=MovieOut)
 def create_movie(
     movie: MovieCreate,
     db: Session = Depends(get_db),
@@ -65,15 +85,17 @@ def create_movie(
         )
         db.add(db_movie)
         db.commit()
-        db.refresh(db_movie)
-        logger.info(f"Created new movie: {movie.title}")
+        invalidate(MOVIES_LIST)
+        logger.info("Created new movie: %s", movie.title)
         return db_movie
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error creating movie: {e}")
+        logger.error("Error creating movie: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Secure Endpoint to update a movie
-@router.put("/{movie_id}", response_model=Movie)
+@router.put("/{movie_id}", response_model=MovieOut)
 def update_movie(
     movie_id: int,
     movie: MovieUpdate,
@@ -81,22 +103,24 @@ def update_movie(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        db_movie = db.query(Movie).filter(Movie.id == movie_id).first()
+        db_movie = db.get(Movie, movie_id)
         if db_movie is None:
-            logger.warning(f"Movie with ID {movie_id} not found.")
+            logger.warning("Movie with ID %s not found.", movie_id)
             raise HTTPException(status_code=404, detail="Movie not found")
         if db_movie.owner_id != current_user.id:
-            logger.warning(f"User {current_user.id} not authorized to update movie with ID {movie_id}.")
+            logger.warning("User %s not authorized to update movie with ID %s.", current_user.id, movie_id)
             raise HTTPException(status_code=403, detail="Not authorized to update this movie")
         db_movie.title = movie.title
         db_movie.description = movie.description
         db_movie.release_year = movie.release_year
         db.commit()
-        db.refresh(db_movie)
-        logger.info(f"Updated movie with ID {movie_id}.")
+        invalidate(MOVIES_LIST, MOVIE_DETAIL)
+        logger.info("Updated movie with ID %s.", movie_id)
         return db_movie
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error updating movie with ID {movie_id}: {e}")
+        logger.error("Error updating movie with ID %s: %s", movie_id, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Secure Endpoint to delete a movie
@@ -107,23 +131,26 @@ def delete_movie(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        db_movie = db.query(Movie).filter(Movie.id == movie_id).first()
+        db_movie = db.get(Movie, movie_id)
         if db_movie is None:
-            logger.warning(f"Movie with ID {movie_id} not found.")
+            logger.warning("Movie with ID %s not found.", movie_id)
             raise HTTPException(status_code=404, detail="Movie not found")
         if db_movie.owner_id != current_user.id:
-            logger.warning(f"User {current_user.id} not authorized to delete movie with ID {movie_id}.")
+            logger.warning("User %s not authorized to delete movie with ID %s.", current_user.id, movie_id)
             raise HTTPException(status_code=403, detail="Not authorized to delete this movie")
         db.delete(db_movie)
         db.commit()
-        logger.info(f"Deleted movie with ID {movie_id}.")
+        invalidate(MOVIES_LIST, MOVIE_DETAIL)
+        logger.info("Deleted movie with ID %s.", movie_id)
         return {"detail": "Movie deleted"}
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error deleting movie with ID {movie_id}: {e}")
+        logger.error("Error deleting movie with ID %s: %s", movie_id, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Endpoint to rate a movie
-@router.post("/{movie_id}/ratings/", response_model=Rating)
+@router.post("/{movie_id}/ratings/", response_model=RatingOut)
 def rate_movie(
     movie_id: int,
     rating: int,  # Adjust as needed (could be a Pydantic model)
@@ -131,9 +158,9 @@ def rate_movie(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        db_movie = db.query(Movie).filter(Movie.id == movie_id).first()
+        db_movie = db.get(Movie, movie_id)
         if db_movie is None:
-            logger.warning(f"Movie with ID {movie_id} not found.")
+            logger.warning("Movie with ID %s not found.", movie_id)
             raise HTTPException(status_code=404, detail="Movie not found")
         db_rating = Rating(
             movie_id=movie_id,
@@ -142,26 +169,32 @@ def rate_movie(
         )
         db.add(db_rating)
         db.commit()
-        db.refresh(db_rating)
-        logger.info(f"Added rating for movie ID {movie_id} by user ID {current_user.id}.")
+        invalidate(MOVIE_RATINGS)
+        logger.info("Added rating for movie ID %s by user ID %s.", movie_id, current_user.id)
         return db_rating
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error adding rating for movie ID {movie_id}: {e}")
+        logger.error("Error adding rating for movie ID %s: %s", movie_id, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Endpoint to get ratings for a movie
-@router.get("/{movie_id}/ratings/", response_model=list[Rating])
-def get_movie_ratings(movie_id: int, db: Session = Depends(get_db)):
+@router.get("/{movie_id}/ratings/", response_model=list[RatingOut])
+@cache(expire=60, namespace=MOVIE_RATINGS)
+async def get_movie_ratings(movie_id: int, db: AsyncSession = Depends(get_async_db)) -> list[RatingOut]:
     try:
-        ratings = db.query(Rating).filter(Rating.movie_id == movie_id).all()
-        logger.info(f"Fetched {len(ratings)} ratings for movie ID {movie_id}.")
-        return ratings
+        query = select(Rating).options(selectinload(Rating.user)).where(Rating.movie_id == movie_id)
+        ratings = (await db.scalars(query)).all()
+        logger.debug("Fetched %d ratings for movie ID %s.", len(ratings), movie_id)
+        return [RatingOut.model_validate(rating) for rating in ratings]
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching ratings for movie ID {movie_id}: {e}")
+        logger.error("Error fetching ratings for movie ID %s: %s", movie_id, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Endpoint to add a comment to a movie
-@router.post("/{movie_id}/comments/", response_model=Comment)
+@router.post("/{movie_id}/comments/", response_model=CommentOut)
 def add_comment(
     movie_id: int,
     comment: str,  # Adjust as needed (could be a Pydantic model)
@@ -169,9 +202,9 @@ def add_comment(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        db_movie = db.query(Movie).filter(Movie.id == movie_id).first()
+        db_movie = db.get(Movie, movie_id)
         if db_movie is None:
-            logger.warning(f"Movie with ID {movie_id} not found.")
+            logger.warning("Movie with ID %s not found.", movie_id)
             raise HTTPException(status_code=404, detail="Movie not found")
         db_comment = Comment(
             movie_id=movie_id,
@@ -180,20 +213,26 @@ def add_comment(
         )
         db.add(db_comment)
         db.commit()
-        db.refresh(db_comment)
-        logger.info(f"Added comment for movie ID {movie_id} by user ID {current_user.id}.")
+        invalidate(MOVIE_COMMENTS)
+        logger.info("Added comment for movie ID %s by user ID %s.", movie_id, current_user.id)
         return db_comment
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error adding comment for movie ID {movie_id}: {e}")
+        logger.error("Error adding comment for movie ID %s: %s", movie_id, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 # Endpoint to view comments for a movie
-@router.get("/{movie_id}/comments/", response_model=list[Comment])
-def get_movie_comments(movie_id: int, db: Session = Depends(get_db)):
+@router.get("/{movie_id}/comments/", response_model=list[CommentOut])
+@cache(expire=60, namespace=MOVIE_COMMENTS)
+async def get_movie_comments(movie_id: int, db: AsyncSession = Depends(get_async_db)) -> list[CommentOut]:
     try:
-        comments = db.query(Comment).filter(Comment.movie_id == movie_id).all()
-        logger.info(f"Fetched {len(comments)} comments for movie ID {movie_id}.")
-        return comments
+        query = select(Comment).options(selectinload(Comment.user)).where(Comment.movie_id == movie_id)
+        comments = (await db.scalars(query)).all()
+        logger.debug("Fetched %d comments for movie ID %s.", len(comments), movie_id)
+        return [CommentOut.model_validate(comment) for comment in comments]
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching comments for movie ID {movie_id}: {e}")
+        logger.error("Error fetching comments for movie ID %s: %s", movie_id, e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
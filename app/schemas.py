@@ -0,0 +1,45 @@
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+# Response models; from_attributes lets FastAPI build them straight from ORM objects
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+
+class UserProfileOut(UserOut):
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    disabled: Optional[bool] = None
+
+class RatingOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    movie_id: Optional[int] = None
+    rating: Optional[int] = None
+    user_id: Optional[int] = None
+    user: Optional[UserOut] = None
+
+class CommentOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    movie_id: Optional[int] = None
+    text: Optional[str] = None
+    user_id: Optional[int] = None
+    parent_id: Optional[int] = None
+    user: Optional[UserOut] = None
+
+class MovieSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: Optional[str] = None
+    release_year: Optional[int] = None
+
+class MovieOut(MovieSummary):
+    description: Optional[str] = None
+    owner_id: Optional[int] = None
@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+
+@contextmanager
+def _recorded_statements(engine):
+    statements = []
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+
+@pytest.fixture
+def record_statements():
+    """Context manager yielding the SQL statements an engine runs inside the block."""
+    return _recorded_statements
@@ -1,7 +1,14 @@
+import asyncio
+import hashlib
+from datetime import timedelta
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import SessionLocal, init_db, Base, engine
+from app.auth import create_access_token, get_current_user, _jwt_cache, SECRET_KEY_BYTES, ALGORITHM, DUMMY_HASH
+import jwt
+from app.models import User
+from app.database import SessionLocal, init_db, Base, engine, async_engine
 
 client = TestClient(app)
 
@@ -10,6 +17,7 @@ def test_db():
     Base.metadata.create_all(bind=engine)
     init_db()
     yield
+    asyncio.run(async_engine.dispose())
     Base.metadata.drop_all(bind=engine)
 
 def test_register_user(test_db):
@@ -17,7 +25,90 @@ def test_register_user(test_db):
     assert response.status_code == 200
     assert response.json()["username"] == "testuser"
 
+def test_register_duplicate_username(test_db):
+    response = client.post("/auth/register/", json={"username": "testuser", "email": "other@example.com", "password": "testpassword"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already registered"
+
+def test_register_duplicate_email(test_db):
+    response = client.post("/auth/register/", json={"username": "otheruser", "email": "testuser@example.com", "password": "testpassword"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
 def test_login_user(test_db):
     response = client.post("/auth/login/", json={"username": "testuser", "password": "testpassword"})
     assert response.status_code == 200
     assert "access_token" in response.json()
+
+def test_login_wrong_password(test_db):
+    response = client.post("/auth/login/", json={"username": "testuser", "email": "testuser@example.com", "password": "wrongpassword"})
+    assert response.status_code == 401
+
+def current_user_for(token):
+    db = SessionLocal()
+    try:
+        return asyncio.run(get_current_user(token=token, db=db)).username
+    finally:
+        db.close()
+
+def test_get_current_user_caches_decoded_token(test_db, monkeypatch):
+    token = create_access_token(data={"sub": "testuser"})
+    assert current_user_for(token) == "testuser"
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token decoded again despite a cache hit")
+    monkeypatch.setattr("app.auth.jwt.decode", fail_decode)
+    assert current_user_for(token) == "testuser"
+
+def test_get_current_user_ignores_cache_entry_past_exp(test_db):
+    token = create_access_token(data={"sub": "testuser"}, expires_delta=timedelta(seconds=-1))
+    # Seed a cache entry whose exp has already passed
+    _jwt_cache[hashlib.sha256(token.encode()).digest()[:16]] = ("testuser", 0)
+    with pytest.raises(HTTPException) as exc_info:
+        current_user_for(token)
+    assert exc_info.value.status_code == 401
+
+def test_get_current_user_does_not_cache_bad_token(test_db):
+    cached = len(_jwt_cache)
+    with pytest.raises(HTTPException):
+        current_user_for("not-a-token")
+    assert len(_jwt_cache) == cached
+
+def test_get_current_user_rejects_deleted_user(test_db):
+    db = SessionLocal()
+    db.add(User(username="shortlived", email="shortlived@example.com"))
+    db.commit()
+    token = create_access_token(data={"sub": "shortlived"})
+    assert current_user_for(token) == "shortlived"
+
+    db.query(User).filter(User.username == "shortlived").delete()
+    db.commit()
+    db.close()
+    with pytest.raises(HTTPException) as exc_info:
+        current_user_for(token)
+    assert exc_info.value.status_code == 401
+
+def test_get_current_user_rejects_token_without_exp(test_db):
+    token = jwt.encode({"sub": "testuser"}, SECRET_KEY_BYTES, algorithm=ALGORITHM)
+    with pytest.raises(HTTPException) as exc_info:
+        current_user_for(token)
+    assert exc_info.value.status_code == 401
+
+def test_login_reuses_recent_successful_password_check(test_db, monkeypatch):
+    credentials = {"username": "testuser", "email": "testuser@example.com", "password": "testpassword"}
+    assert client.post("/auth/login/", json=credentials).status_code == 200
+
+    def fail_verify(*args, **kwargs):
+        raise AssertionError("bcrypt ran again despite a cached successful check")
+    monkeypatch.setattr("app.auth.verify_password", fail_verify)
+    assert client.post("/auth/login/", json=credentials).status_code == 200
+
+def test_login_unknown_user_still_checks_a_hash(test_db, monkeypatch):
+    checked = []
+    def record_verify(plain_password, hashed_password):
+        checked.append(hashed_password)
+        return False
+    monkeypatch.setattr("app.auth.verify_password", record_verify)
+    response = client.post("/auth/login/", json={"username": "nosuchuser", "email": "nosuchuser@example.com", "password": "testpassword"})
+    assert response.status_code == 401
+    assert checked == [DUMMY_HASH]
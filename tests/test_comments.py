@@ -1,7 +1,9 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import SessionLocal, init_db, Base, engine
+from app.database import SessionLocal, init_db, Base, engine, async_engine
+from app.models import User, Movie, Comment
 
 client = TestClient(app)
 
@@ -10,6 +12,7 @@ def test_db():
     Base.metadata.create_all(bind=engine)
     init_db()
     yield
+    asyncio.run(async_engine.dispose())
     Base.metadata.drop_all(bind=engine)
 
 def test_add_comment(test_db):
@@ -17,3 +20,23 @@ def test_add_comment(test_db):
     response = client.post("/comments/", json={"movie_id": 1, "text": "Great movie!"}, headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert response.json()["text"] == "Great movie!"
+
+def test_get_movie_comments_query_count(test_db, record_statements):
+    db = SessionLocal()
+    users = [User(username=f"commenter{i}", email=f"commenter{i}@example.com") for i in range(5)]
+    movie = Movie(title="Query Count Movie", description="", release_year=2024)
+    db.add_all(users + [movie])
+    db.flush()
+    db.add_all([Comment(movie_id=movie.id, text=f"Comment {i}", user_id=user.id) for i, user in enumerate(users)])
+    db.commit()
+    movie_id = movie.id
+    db.close()
+
+    with record_statements(async_engine.sync_engine) as statements:
+        response = client.get(f"/movies/{movie_id}/comments/")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert all("hashed_password" not in comment["user"] for comment in response.json())
+    # One SELECT for the comments and one for all of their users
+    assert len(statements) == 2
@@ -1,7 +1,10 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import SessionLocal, init_db, Base, engine
+from app.database import SessionLocal, init_db, Base, engine, async_engine
+from app.models import Movie, User
+from app.auth import create_access_token
 
 client = TestClient(app)
 
@@ -10,6 +13,7 @@ def test_db():
     Base.metadata.create_all(bind=engine)
     init_db()
     yield
+    asyncio.run(async_engine.dispose())
     Base.metadata.drop_all(bind=engine)
 
 def test_create_movie(test_db):
@@ -22,3 +26,49 @@ def test_read_movies(test_db):
     response = client.get("/movies/")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+def test_read_movies_keyset_pagination(test_db):
+    db = SessionLocal()
+    db.add_all([Movie(title=f"Paged Movie {i}", description="", release_year=2000 + i) for i in range(3)])
+    db.commit()
+    db.close()
+
+    first_page = client.get("/movies/", params={"limit": 2}).json()
+    assert len(first_page) == 2
+    assert set(first_page[0]) == {"id", "title", "release_year"}
+    second_page = client.get("/movies/", params={"after_id": first_page[-1]["id"], "limit": 2}).json()
+    assert all(movie["id"] > first_page[-1]["id"] for movie in second_page)
+
+@pytest.mark.parametrize("limit", [-1, 0, 101])
+def test_read_movies_rejects_out_of_range_limit(test_db, limit):
+    assert client.get("/movies/", params={"limit": limit}).status_code == 422
+
+def test_read_movies_cached_until_write(test_db):
+    db = SessionLocal()
+    db.add(User(username="cacheowner", email="cacheowner@example.com"))
+    db.commit()
+    db.close()
+    token = create_access_token(data={"sub": "cacheowner"})
+
+    params = {"limit": 100}
+    assert client.get("/movies/", params=params).headers["X-FastAPI-Cache"] == "MISS"
+    cached = client.get("/movies/", params=params)
+    assert cached.headers["X-FastAPI-Cache"] == "HIT"
+    assert cached.headers["Cache-Control"].startswith("max-age=")
+    not_modified = client.get("/movies/", params=params, headers={"If-None-Match": cached.headers["ETag"]})
+    assert not_modified.status_code == 304
+
+    response = client.post("/movies/", json={"title": "Cache Buster", "description": "", "release_year": 2024}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    refreshed = client.get("/movies/", params=params)
+    assert refreshed.headers["X-FastAPI-Cache"] == "MISS"
+    assert len(refreshed.json()) == len(cached.json()) + 1
+
+def test_create_movie_skips_select_after_insert(test_db, record_statements):
+    token = create_access_token(data={"sub": "cacheowner"})
+    with record_statements(engine) as statements:
+        response = client.post("/movies/", json={"title": "No Refresh", "description": "", "release_year": 2024}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json()["id"] is not None
+    assert not any(statement.startswith("SELECT") and "FROM movies" in statement for statement in statements)
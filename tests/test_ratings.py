@@ -1,7 +1,9 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import SessionLocal, init_db, Base, engine
+from app.database import SessionLocal, init_db, Base, engine, async_engine
+from app.models import User, Movie, Rating
 
 client = TestClient(app)
 
@@ -10,6 +12,7 @@ def test_db():
     Base.metadata.create_all(bind=engine)
     init_db()
     yield
+    asyncio.run(async_engine.dispose())
     Base.metadata.drop_all(bind=engine)
 
 def test_rate_movie(test_db):
@@ -17,3 +20,23 @@ def test_rate_movie(test_db):
     response = client.post("/ratings/", json={"movie_id": 1, "rating": 5}, headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert response.json()["rating"] == 5
+
+def test_get_movie_ratings_query_count(test_db, record_statements):
+    db = SessionLocal()
+    users = [User(username=f"rater{i}", email=f"rater{i}@example.com") for i in range(5)]
+    movie = Movie(title="Rated Movie", description="", release_year=2024)
+    db.add_all(users + [movie])
+    db.flush()
+    db.add_all([Rating(movie_id=movie.id, rating=i + 1, user_id=user.id) for i, user in enumerate(users)])
+    db.commit()
+    movie_id = movie.id
+    db.close()
+
+    with record_statements(async_engine.sync_engine) as statements:
+        response = client.get(f"/movies/{movie_id}/ratings/")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert all("hashed_password" not in rating["user"] for rating in response.json())
+    # One SELECT for the ratings and one for all of their users
+    assert len(statements) == 2